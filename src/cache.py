@@ -0,0 +1,67 @@
+# path: src/cache.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(request: Dict[str, Any]) -> str:
+    """Stable key for a chat completion request (model, messages, sampling)."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache for model responses.
+
+    Entries always live in memory. When `path` is set they are also loaded from
+    and appended to a JSONL file, so repeated CLI runs reuse earlier answers.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._entries: Dict[str, str] = {}
+        # Set when the file ends in a torn record, so the next append starts
+        # on a fresh line instead of extending the broken one.
+        self._needs_newline = False
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        with open(path, encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                self._needs_newline = not line.endswith("\n")
+                line = line.strip()
+                if not line:
+                    continue
+                # A run killed mid-append leaves a torn line; skip it rather
+                # than making the whole cache (and every command) unusable.
+                try:
+                    record = json.loads(line)
+                    self._entries[record["key"]] = record["value"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Skipping unreadable cache line %d in %s", lineno, path)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    def put(self, key: str, value: str) -> None:
+        self._entries[key] = value
+        if self.path:
+            # One write per record, so a record is never split across calls.
+            line = json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+            if self._needs_newline:
+                line = "\n" + line
+                self._needs_newline = False
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+
+    def __len__(self) -> int:
+        return len(self._entries)
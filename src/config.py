@@ -6,16 +6,82 @@ load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Log level for the CLI (e.g. DEBUG shows every model call).
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+
 # Groq-provided models
 # You can change these to ANY model listed in https://console.groq.com/docs/models
+# or to one of the speed tier names below.
+
+SPEED_TIERS = {
+    "instant": "llama-3.1-8b-instant",
+    "balanced": "llama-3.3-70b-versatile",
+}
+
+
+def _resolve_model(value: str) -> str:
+    return SPEED_TIERS.get(value, value)
+
+
+# Stage A writes free text, so it gets the larger model. Stages B and C only
+# emit one of four labels, which the instant tier handles at a fraction of the
+# latency.
+MODEL_A_NAME = _resolve_model(os.getenv("MODEL_A_NAME", "balanced"))
+MODEL_B_NAME = _resolve_model(os.getenv("MODEL_B_NAME", "instant"))
+MODEL_C_NAME = _resolve_model(os.getenv("MODEL_C_NAME", "instant"))
+
+# Output token caps per stage. B and C only emit one label line plus a short
+# rationale; reasoning models count hidden reasoning tokens against the cap, so
+# raise these if their answers come back truncated or empty.
+MODEL_A_MAX_TOKENS = int(os.getenv("MODEL_A_MAX_TOKENS", "200"))
+MODEL_B_MAX_TOKENS = int(os.getenv("MODEL_B_MAX_TOKENS", "64"))
+MODEL_C_MAX_TOKENS = int(os.getenv("MODEL_C_MAX_TOKENS", "64"))
+# JSON-mode answers (--json-output) are only parseable once the object closes,
+# so they get room for the whole rationale string instead of the label caps.
+MODEL_JSON_MAX_TOKENS = int(os.getenv("MODEL_JSON_MAX_TOKENS", "256"))
+
+# Stream Stage B/C answers and stop reading as soon as the label line has
+# arrived. Saves output tokens, but the model's rationale is then missing from
+# stage_b_raw / stage_c_raw, so it is off by default.
+EARLY_ABORT = os.getenv("EARLY_ABORT", "0") == "1"
+
+# Sampling temperature shared by all stages. Responses are only cached when it
+# is 0, because only then is a (model, prompt) pair expected to be reproducible.
+MODEL_TEMPERATURE = float(os.getenv("MODEL_TEMPERATURE", "0"))
+
+# Optional JSONL file that persists the response cache across runs.
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH") or None
+
+# Optional near-duplicate cache for Stage A (needs sentence-transformers).
+SEMANTIC_CACHE_MODEL = os.getenv(
+    "SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# Upper bound on in-flight model requests when events run concurrently.
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "10"))
+
+# Provider quotas used to pace requests proactively (0 disables pacing).
+RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", "0"))
+RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", "0"))
+
+# Retries for rate limits, 5xx responses and connection errors.
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "4"))
+
+# Timeout (seconds) for a single HTTP request to the model API.
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "30"))
+
+_VALIDATED = False
 
-MODEL_A_NAME = os.getenv("MODEL_A_NAME", "llama-3.1-8b-instant")
-MODEL_B_NAME = os.getenv("MODEL_B_NAME", "openai/gpt-oss-20b")
-MODEL_C_NAME = os.getenv("MODEL_C_NAME", "qwen/qwen3-32b")
 
 def validate_config():
+    global _VALIDATED
+    if _VALIDATED:
+        return
     missing = []
     if not GROQ_API_KEY:
         missing.append("GROQ_API_KEY")
     if missing:
         raise RuntimeError("Missing required config: " + ", ".join(missing))
+    _VALIDATED = True
+
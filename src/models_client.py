@@ -1,47 +1,494 @@
 # src/models_client.py
 
-from typing import Literal
-from groq import Groq
+from __future__ import annotations
 
+import asyncio
+import functools
+import logging
+import random
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Pattern,
+    Tuple,
+)
+
+from .cache import ResponseCache, make_cache_key
 from .config import (
     GROQ_API_KEY,
     MODEL_A_NAME,
+    MODEL_A_MAX_TOKENS,
     MODEL_B_NAME,
+    MODEL_B_MAX_TOKENS,
     MODEL_C_NAME,
+    MODEL_C_MAX_TOKENS,
+    MODEL_JSON_MAX_TOKENS,
+    MAX_CONCURRENCY,
+    MAX_RETRIES,
+    MODEL_TEMPERATURE,
+    RATE_LIMIT_RPM,
+    RATE_LIMIT_TPM,
+    REQUEST_TIMEOUT,
+    RESPONSE_CACHE_PATH,
     validate_config,
 )
+from .ratelimit import RateLimiter, estimate_tokens
+
+# The Groq SDK (and httpx under it) dominates import time, so it is only
+# loaded once a request is actually made. `--help` and code that just reads
+# saved results never pay for it.
+if TYPE_CHECKING:
+    import httpx
+    from groq import AsyncGroq
+
+logger = logging.getLogger(__name__)
 
 RoleType = Literal["user"]
 
 
+@dataclass(frozen=True)
+class ModelNames:
+    """Model ids used for Stage A/B/C."""
+    model_a: str
+    model_b: str
+    model_c: str
+
+
+# Resolved once from config; clients share it unless given explicit overrides.
+_MODEL_NAMES = ModelNames(
+    model_a=MODEL_A_NAME,
+    model_b=MODEL_B_NAME,
+    model_c=MODEL_C_NAME,
+)
+
+# B/C answers are "LABEL: X" followed by a one-paragraph rationale, so a blank
+# line means the structured part is complete.
+_STRUCTURED_STOP = ["\n\n"]
+_JSON_OBJECT: Dict[str, str] = {"type": "json_object"}
+
+
+@functools.lru_cache(maxsize=None)
+def _retryable_errors() -> Tuple[type, ...]:
+    """Transient failures worth retrying. Auth and other 4xx errors fail fast."""
+    from groq import APIConnectionError, InternalServerError, RateLimitError
+
+    return (RateLimitError, InternalServerError, APIConnectionError)
+
+
+def _retry_delay(attempt: int, exc: Exception) -> float:
+    """Exponential backoff with jitter, honoring Retry-After when present."""
+    delay = min(30.0, 2.0**attempt) + random.random()
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+def _chunk_usage(chunk: Any) -> Any:
+    """Token usage on a stream chunk; Groq reports it in `x_groq.usage` at the end."""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    return usage
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP/2 client so stage calls reuse warm keep-alive connections."""
+    import httpx
+
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONCURRENCY * 2,
+            max_keepalive_connections=MAX_CONCURRENCY * 2,
+            keepalive_expiry=60.0,
+        ),
+        timeout=REQUEST_TIMEOUT,
+    )
+
+
 class ModelClient:
     """
     Single Groq client for all Stage A/B/C calls.
-    Each stage uses a different Groq model name defined in config.py.
+    Each stage uses a different Groq model name defined in config.py
+    (or in the ModelNames passed to the constructor).
+    Identical requests are answered from an exact-match response cache.
+    All calls are async so events can be processed concurrently.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, model_names: Optional[ModelNames] = None) -> None:
         validate_config()
-        self.client = Groq(api_key=GROQ_API_KEY)
+        self.models = model_names or _MODEL_NAMES
+        self.cache = ResponseCache(RESPONSE_CACHE_PATH)
+        self.limiter = RateLimiter(RATE_LIMIT_RPM, RATE_LIMIT_TPM)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncGroq] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
 
-    def _call(self, model_name: str, content: str) -> str:
-        """Internal helper to call a Groq chat model."""
-        print(f"Calling model: {model_name}")
-        resp = self.client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": content}],
-            temperature=0.2,
-        )
-        return resp.choices[0].message.content or ""
+    def _bind_loop(self) -> tuple[AsyncGroq, asyncio.Semaphore]:
+        """
+        Return the async client and concurrency limiter for the running loop.
+
+        Both are tied to the event loop that first uses them, so they are
+        rebuilt whenever a new loop is running (e.g. one asyncio.run per call).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._client is None or self._semaphore is None:
+            from groq import AsyncGroq
+
+            self._loop = loop
+            # Retries are handled in _call, so the SDK's own retry loop is off.
+            self._client = AsyncGroq(
+                api_key=GROQ_API_KEY,
+                http_client=_build_http_client(),
+                max_retries=0,
+            )
+            self._semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+            self.limiter.reset_lock()
+            self._inflight = {}
+        return self._client, self._semaphore
+
+    async def aclose(self) -> None:
+        """Close pooled connections held for the running event loop."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.close()
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+
+    async def _call(
+        self,
+        model_name: str,
+        content: str,
+        max_tokens: Optional[int] = None,
+        stop: Optional[List[str]] = None,
+        until: Optional[Pattern[str]] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+        on_match: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Internal helper to call a Groq chat model.
+
+        When `until` is given the response is streamed and the stream is closed
+        as soon as the accumulated text matches it, so only the prefix up to
+        the first match is returned. With `on_match` as well, the stream is
+        read to the end instead and `on_match` gets that prefix as soon as it
+        appears. use_cache=False always calls the API.
+        """
+        request: Dict[str, Any] = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": content}],
+            "temperature": MODEL_TEMPERATURE,
+        }
+        if max_tokens is not None:
+            request["max_tokens"] = max_tokens
+        if stop:
+            request["stop"] = stop
+        if response_format is not None:
+            request["response_format"] = response_format
+
+        # Only deterministic requests are safe to replay from the cache.
+        # Early-aborted answers are truncated, so the pattern is part of the key.
+        # Watched streams run to the end and share the plain request's entry.
+        key = None
+        if use_cache and MODEL_TEMPERATURE == 0:
+            aborts = until is not None and on_match is None
+            key_fields = dict(request, until=until.pattern) if aborts else request
+            key = make_cache_key(key_fields)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        client, semaphore = self._bind_loop()
+        if key is None:
+            return await self._request(client, semaphore, request, until, on_match)
+
+        # Identical requests already in flight share one API call.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch(key, client, semaphore, request, until, on_match)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self,
+        key: str,
+        client: AsyncGroq,
+        semaphore: asyncio.Semaphore,
+        request: Dict[str, Any],
+        until: Optional[Pattern[str]],
+        on_match: Optional[Callable[[str], None]],
+    ) -> str:
+        """Shared in-flight request; caches its answer once for all waiters."""
+        text = await self._request(client, semaphore, request, until, on_match)
+        if text:
+            self.cache.put(key, text)
+        return text
+
+    async def _request(
+        self,
+        client: AsyncGroq,
+        semaphore: asyncio.Semaphore,
+        request: Dict[str, Any],
+        until: Optional[Pattern[str]],
+        on_match: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Send one request, retrying transient failures with backoff."""
+        model_name = request["model"]
+        content = request["messages"][-1]["content"]
+        estimated = estimate_tokens(content, request.get("max_tokens") or 0)
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                await self.limiter.acquire(estimated)
+                async with semaphore:
+                    logger.debug("Calling model: %s", model_name)
+                    if until is None:
+                        resp = await client.chat.completions.create(**request)
+                        text = resp.choices[0].message.content or ""
+                        usage = resp.usage
+                    else:
+                        text, usage = await self._stream_until(
+                            client, request, until, on_match
+                        )
+                if usage is not None:
+                    self.limiter.record_usage(estimated, usage.total_tokens)
+                break
+            except _retryable_errors() as exc:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = _retry_delay(attempt, exc)
+                logger.warning(
+                    "Retrying %s in %.1fs (%s)", model_name, delay, type(exc).__name__
+                )
+                # Sleep outside the semaphore so other requests keep flowing.
+                await asyncio.sleep(delay)
+        return text
+
+    @staticmethod
+    async def _stream_until(
+        client: AsyncGroq,
+        request: Dict[str, Any],
+        until: Pattern[str],
+        on_match: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, Any]:
+        """
+        Stream a completion and stop reading once `until` matches. With
+        `on_match`, keep reading to the end and hand it the matched prefix the
+        first time `until` matches.
+
+        Returns the text and the usage reported on the final chunk. A stream
+        closed early never reaches that chunk, so its usage is None and the
+        rate limiter keeps the pre-call estimate.
+        """
+        stream = await client.chat.completions.create(**request, stream=True)
+        text = ""
+        usage = None
+        matched = False
+        try:
+            async for chunk in stream:
+                usage = _chunk_usage(chunk) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                text += delta
+                if matched:
+                    continue
+                match = until.search(text)
+                if match is None:
+                    continue
+                if on_match is None:
+                    # Drop whatever else arrived in the same chunk.
+                    return text[: match.end()], None
+                matched = True
+                on_match(text[: match.end()])
+        finally:
+            await stream.close()
+        return text, usage
 
     # Stage A: summary
-    def call_model_a(self, content: str) -> str:
-        return self._call(MODEL_A_NAME, content)
+    async def call_model_a(
+        self,
+        content: str,
+        max_tokens: int = MODEL_A_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_a, content, max_tokens=max_tokens, use_cache=use_cache
+        )
 
     # Stage B: classification
-    def call_model_b(self, content: str) -> str:
-        return self._call(MODEL_B_NAME, content)
+    async def call_model_b(
+        self,
+        content: str,
+        max_tokens: int = MODEL_B_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            use_cache=use_cache,
+        )
+
+    async def call_model_b_stream(
+        self,
+        content: str,
+        until: Pattern[str],
+        max_tokens: int = MODEL_B_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            until=until,
+            use_cache=use_cache,
+        )
+
+    async def call_model_b_watch(
+        self,
+        content: str,
+        until: Pattern[str],
+        on_match: Callable[[str], None],
+        max_tokens: int = MODEL_B_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        """Full Stage B answer, streamed so `on_match` sees the label early."""
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            until=until,
+            use_cache=use_cache,
+            on_match=on_match,
+        )
+
+    async def call_model_b_json(
+        self,
+        content: str,
+        max_tokens: int = MODEL_JSON_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            response_format=_JSON_OBJECT,
+            use_cache=use_cache,
+        )
+
+    # Stages B + C fused into one call on model B
+    async def call_model_bc(
+        self,
+        content: str,
+        max_tokens: int = MODEL_B_MAX_TOKENS + MODEL_C_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            use_cache=use_cache,
+        )
+
+    async def call_model_bc_stream(
+        self,
+        content: str,
+        until: Pattern[str],
+        max_tokens: int = MODEL_B_MAX_TOKENS + MODEL_C_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            until=until,
+            use_cache=use_cache,
+        )
+
+    async def call_model_bc_json(
+        self,
+        content: str,
+        max_tokens: int = MODEL_JSON_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_b,
+            content,
+            max_tokens=max_tokens,
+            response_format=_JSON_OBJECT,
+            use_cache=use_cache,
+        )
 
     # Stage C: decision/action
-    def call_model_c(self, content: str) -> str:
-        return self._call(MODEL_C_NAME, content)
+    async def call_model_c(
+        self,
+        content: str,
+        max_tokens: int = MODEL_C_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_c,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            use_cache=use_cache,
+        )
+
+    async def call_model_c_stream(
+        self,
+        content: str,
+        until: Pattern[str],
+        max_tokens: int = MODEL_C_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_c,
+            content,
+            max_tokens=max_tokens,
+            stop=_STRUCTURED_STOP,
+            until=until,
+            use_cache=use_cache,
+        )
+
+    async def call_model_c_json(
+        self,
+        content: str,
+        max_tokens: int = MODEL_JSON_MAX_TOKENS,
+        use_cache: bool = True,
+    ) -> str:
+        return await self._call(
+            self.models.model_c,
+            content,
+            max_tokens=max_tokens,
+            response_format=_JSON_OBJECT,
+            use_cache=use_cache,
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> ModelClient:
+    """Shared ModelClient, created (and config validated) on first use."""
+    return ModelClient()
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import sys
+from typing import Any, List, Optional
 
-from rich.console import Console
+import orjson
+from rich.console import Console, Group, RenderableType
 from rich.markup import escape
 from rich.panel import Panel
+from rich.rule import Rule
 from rich.table import Table
 from rich.theme import Theme
 
@@ -53,50 +56,98 @@ def _action_style(action: Optional[ActionType]) -> str:
     }.get(action, "")
 
 
-def pretty_print_result(result: StageResult) -> None:
+# ANSI equivalents of the theme styles, for the plain-text writer.
+_ANSI = {
+    "risk.low": "\x1b[32m",
+    "risk.medium": "\x1b[33m",
+    "risk.high": "\x1b[31m",
+    "risk.critical": "\x1b[1;31m",
+    "action.IGNORE": "\x1b[2m",
+    "action.MONITOR": "\x1b[36m",
+    "action.ALERT": "\x1b[1;33m",
+    "action.ESCALATE": "\x1b[1;31m",
+}
+_ANSI_RESET = "\x1b[0m"
+
+
+def _ansi(label: Optional[str], style: str, color: bool) -> str:
+    code = _ANSI.get(style) if color else None
+    return f"{code}{label}{_ANSI_RESET}" if code else str(label)
+
+
+def _plain_print_result(result: StageResult, color: bool = False) -> None:
     """
-    Pretty-print a single StageResult with Rich.
+    Write a single StageResult as plain text. Used when stdout is not a
+    terminal (or with --plain), where Rich layout (width measurement, panels)
+    is wasted work. With color=True the parsed labels get ANSI colors.
     """
-    console.rule(
-        f"[title] MODE={result['mode']} | ATTACK={result['attack_profile']} [/title]"
-    )
-
-    console.print(
+    lines = [
+        f"=== MODE={result.mode} | ATTACK={result.attack_profile} ===",
+        f"RAW INPUT (clean): {result.raw_input}",
+    ]
+    if result.attack_profile != "none":
+        lines.append(f"FIRST ATTACKED INPUT: {result.attacked_input}")
+    risk = _ansi(result.stage_b_risk, _risk_style(result.stage_b_risk), color)
+    action = _ansi(result.stage_c_action, _action_style(result.stage_c_action), color)
+    lines += [
+        f"STAGE A (summary): {result.stage_a_summary}",
+        f"STAGE B (classification): {result.stage_b_raw}",
+        f"  Parsed: {risk}",
+        f"STAGE C (decision): {result.stage_c_raw}",
+        f"  Parsed: {action}",
+        "",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def pretty_print_result(result: StageResult, plain: bool = False) -> None:
+    """
+    Pretty-print a single StageResult with Rich. Falls back to plain text when
+    stdout is not a tty, or when `plain` is set (colored labels only).
+    """
+    if plain or not console.is_terminal:
+        _plain_print_result(result, color=plain and console.is_terminal)
+        return
+
+    # Collect every renderable and print once, so the console measures and
+    # takes its lock a single time per event.
+    renderables: List[RenderableType] = [
+        Rule(f"[title] MODE={result.mode} | ATTACK={result.attack_profile} [/title]"),
         Panel.fit(
-            result["raw_input"],
+            result.raw_input,
             title="[section]RAW INPUT (clean)[/section]",
             border_style="cyan",
-        )
-    )
+        ),
+    ]
 
-    if result["attack_profile"] != "none":
-        console.print(
+    if result.attack_profile != "none":
+        renderables.append(
             Panel.fit(
-                escape(result["attacked_input"]),
+                escape(result.attacked_input),
                 title="[section]FIRST ATTACKED INPUT[/section]",
                 border_style="red",
             )
         )
 
-    console.print(
+    renderables.append(
         Panel.fit(
-            result["stage_a_summary"],
+            result.stage_a_summary,
             title="[section]STAGE A (summary)[/section]",
             border_style="magenta",
         )
     )
 
     table_b = Table(show_header=False, box=None)
-    table_b.add_row("Raw:", result["stage_b_raw"])
-    if result["stage_b_risk"]:
+    table_b.add_row("Raw:", result.stage_b_raw)
+    if result.stage_b_risk:
         table_b.add_row(
             "Parsed:",
-            f"[{_risk_style(result['stage_b_risk'])}]{result['stage_b_risk']}[/]",
+            f"[{_risk_style(result.stage_b_risk)}]{result.stage_b_risk}[/]",
         )
     else:
         table_b.add_row("Parsed:", "None")
 
-    console.print(
+    renderables.append(
         Panel.fit(
             table_b,
             title="[section]STAGE B (classification)[/section]",
@@ -105,16 +156,16 @@ def pretty_print_result(result: StageResult) -> None:
     )
 
     table_c = Table(show_header=False, box=None)
-    table_c.add_row("Raw:", result["stage_c_raw"])
-    if result["stage_c_action"]:
+    table_c.add_row("Raw:", result.stage_c_raw)
+    if result.stage_c_action:
         table_c.add_row(
             "Parsed:",
-            f"[{_action_style(result['stage_c_action'])}]{result['stage_c_action']}[/]",
+            f"[{_action_style(result.stage_c_action)}]{result.stage_c_action}[/]",
         )
     else:
         table_c.add_row("Parsed:", "None")
 
-    console.print(
+    renderables.append(
         Panel.fit(
             table_c,
             title="[section]STAGE C (decision)[/section]",
@@ -122,6 +173,8 @@ def pretty_print_result(result: StageResult) -> None:
         )
     )
 
+    console.print(Group(*renderables))
+
 
 def print_bypass_insights(summary: dict[str, dict[str, object]]) -> None:
     """
@@ -130,7 +183,35 @@ def print_bypass_insights(summary: dict[str, dict[str, object]]) -> None:
     console.rule("[title]INSIGHTS[/title]")
     for event, data in summary.items():
         effect = data["effect"]  # type: ignore[assignment]
-        assert isinstance(effect, dict)
+        assert isinstance(effect, BypassEffect)
         console.print(f"[bold]{event}[/bold]")
-        console.print(f"Pattern: {effect['pattern']}")
-        console.print(f"Insight: {effect['insight']}\n")
+        console.print(f"Pattern: {effect.pattern}")
+        console.print(f"Insight: {effect.insight}\n")
+
+
+def print_json_summary(data: Any) -> None:
+    """
+    Print the JSON summary. On a terminal Rich highlights it; otherwise the
+    orjson-encoded bytes go straight to stdout without a stdlib re-parse.
+    """
+    console.rule("[title]JSON SUMMARY[/title]")
+    if console.is_terminal:
+        console.print_json(orjson.dumps(data).decode())
+        return
+
+    _write_stdout(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+
+
+def print_json_line(data: Any) -> None:
+    """Write one compact JSON record per line (JSON Lines) and flush it."""
+    _write_stdout(orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def _write_stdout(encoded: bytes) -> None:
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is not None:
+        buffer.write(encoded)
+        buffer.flush()
+    else:
+        sys.stdout.write(encoded.decode())
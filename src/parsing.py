@@ -0,0 +1,103 @@
+# path: src/parsing.py
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional, Tuple, get_args
+
+import orjson
+
+from .types import RiskLevel, ActionType
+
+
+# The optional quotes also match JSON keys and values ("risk_level": "HIGH"),
+# so a JSON-mode answer that was cut off before it closed still yields labels.
+RISK_RE = re.compile(r'RISK_LEVEL"?\s*:\s*"?(LOW|MEDIUM|HIGH|CRITICAL)', re.IGNORECASE)
+ACTION_RE = re.compile(r'ACTION"?\s*:\s*"?(IGNORE|MONITOR|ALERT|ESCALATE)', re.IGNORECASE)
+# Fused B+C answers list the risk level first, then the action.
+FUSED_RE = re.compile(
+    RISK_RE.pattern + r"[\s\S]*?" + ACTION_RE.pattern,
+    re.IGNORECASE,
+)
+# Either label, so a combined answer can be scanned in one pass.
+_LABEL_RE = re.compile(RISK_RE.pattern + "|" + ACTION_RE.pattern, re.IGNORECASE)
+
+
+# Map each label to the canonical (interned) literal from types.py, so every
+# parsed result shares those objects instead of holding a fresh string, and
+# later comparisons and score lookups hit the identity fast path.
+_RISK_LEVELS: Dict[str, str] = {label: label for label in get_args(RiskLevel)}
+_ACTIONS: Dict[str, str] = {label: label for label in get_args(ActionType)}
+
+
+def _leading_label(text: str, marker: str, labels: Dict[str, str]) -> Optional[str]:
+    """
+    Fast path for answers that follow the format contract and open with
+    `MARKER: LABEL`. Returns None when the text needs the full regex search.
+    """
+    head = text.lstrip()
+    if not head.startswith(marker):
+        return None
+    rest = head[len(marker):len(marker) + 24].lstrip()
+    if not rest.startswith(":"):
+        return None
+    token = rest[1:].split(None, 1)
+    if not token:
+        return None
+    return labels.get(token[0].upper())
+
+
+def extract_risk_level(text: str) -> Optional[RiskLevel]:
+    """Extract normalized risk level from model output."""
+    label = _leading_label(text, "RISK_LEVEL", _RISK_LEVELS)
+    if label is not None:
+        return label  # type: ignore[return-value]
+    match = RISK_RE.search(text)
+    if not match:
+        return None
+    return _RISK_LEVELS[match.group(1).upper()]  # type: ignore[return-value]
+
+
+def extract_action(text: str) -> Optional[ActionType]:
+    """Extract normalized action from model output."""
+    label = _leading_label(text, "ACTION", _ACTIONS)
+    if label is not None:
+        return label  # type: ignore[return-value]
+    match = ACTION_RE.search(text)
+    if not match:
+        return None
+    return _ACTIONS[match.group(1).upper()]  # type: ignore[return-value]
+
+
+def extract_labels(text: str) -> Tuple[Optional[RiskLevel], Optional[ActionType]]:
+    """Extract the first risk level and first action from one output in a single scan."""
+    risk: Optional[str] = None
+    action: Optional[str] = None
+    for match in _LABEL_RE.finditer(text):
+        if risk is None and match.group(1):
+            risk = _RISK_LEVELS[match.group(1).upper()]
+        elif action is None and match.group(2):
+            action = _ACTIONS[match.group(2).upper()]
+        if risk is not None and action is not None:
+            break
+    return risk, action  # type: ignore[return-value]
+
+
+def extract_json_labels(text: str) -> Tuple[Optional[RiskLevel], Optional[ActionType]]:
+    """
+    Read `risk_level` / `action` from a JSON-mode answer. Falls back to the
+    label regexes if the text is not a JSON object.
+    """
+    try:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return extract_labels(text)
+    if not isinstance(data, dict):
+        return extract_labels(text)
+
+    risk = str(data.get("risk_level") or "").upper()
+    action = str(data.get("action") or "").upper()
+    return (
+        _RISK_LEVELS.get(risk),  # type: ignore[return-value]
+        _ACTIONS.get(action),
+    )
@@ -2,18 +2,295 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import asyncio
+import logging
+from contextlib import nullcontext
+from dataclasses import asdict
+from pathlib import Path
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    List,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+import orjson
 import typer
+from rich.live import Live
+from rich.progress import Progress
 from rich.table import Table
 
-from .types import ModeType, AttackProfileType, StageResult
-from .core import run_pipeline, compute_bypass_effect, default_events
-from .output import console, pretty_print_result, print_bypass_insights
+from .config import LOG_LEVEL
+from .types import ModeType, AttackProfileType, CacheMode, StageResult
+from .core import (
+    arun_events,
+    arun_pipeline,
+    aclose_client,
+    compute_bypass_effect,
+    default_events,
+    to_columns,
+)
+from .output import (
+    console,
+    pretty_print_result,
+    print_bypass_insights,
+    print_json_line,
+    print_json_summary,
+)
 
 
+logger = logging.getLogger(__name__)
+
 app = typer.Typer(help="Model-to-model security control pipeline with threat simulation")
 
+# Options shared by every command.
+_FusedBcOption = Annotated[
+    bool,
+    typer.Option("--fused-bc", help="Answer Stages B and C with a single model call."),
+]
+_CacheOption = Annotated[
+    CacheMode,
+    typer.Option(
+        "--cache",
+        help=(
+            "off|exact|semantic — semantic also reuses Stage A summaries for "
+            "near-duplicate events (needs sentence-transformers)."
+        ),
+    ),
+]
+_JsonOutputOption = Annotated[
+    bool,
+    typer.Option(
+        "--json-output",
+        help="Ask Stages B and C for JSON objects (provider JSON mode) instead of labelled lines.",
+    ),
+]
+
+T = TypeVar("T")
+
+
+def _run_async(coro: Awaitable[T]) -> T:
+    """Run a coroutine on a fresh loop and close the HTTP pool before it exits."""
+
+    async def _runner() -> T:
+        try:
+            return await coro
+        finally:
+            await aclose_client()
+
+    return asyncio.run(_runner())
+
+
+async def _compare_pairs(
+    events: List[str],
+    mode: ModeType,
+    attack: AttackProfileType,
+    fused_bc: bool,
+    cache_mode: CacheMode,
+    json_output: bool,
+) -> AsyncIterator[Tuple[str, StageResult, StageResult]]:
+    """
+    Run the clean and attacked variants of every event concurrently and yield
+    (event, clean, attacked) as soon as both runs of an event are done.
+    """
+
+    async def _pair(event: str) -> Tuple[str, StageResult, StageResult]:
+        clean, attacked = await asyncio.gather(
+            arun_pipeline(event, mode, "none", fused_bc, cache_mode, json_output),
+            arun_pipeline(event, mode, attack, fused_bc, cache_mode, json_output),
+        )
+        return event, clean, attacked
+
+    for finished in asyncio.as_completed([_pair(event) for event in events]):
+        yield await finished
+
+
+async def _stream_compare(
+    events: List[str],
+    mode: ModeType,
+    attack: AttackProfileType,
+    fused_bc: bool,
+    cache_mode: CacheMode,
+    json_output: bool,
+) -> Tuple[int, int]:
+    """
+    Print one JSON line per event as soon as its clean and attacked runs are
+    both done. Only the counters are kept; returns (total, bypassed).
+    """
+    total = 0
+    success = 0
+    pairs = _compare_pairs(events, mode, attack, fused_bc, cache_mode, json_output)
+    async for event, clean, attacked in pairs:
+        effect = compute_bypass_effect(clean, attacked)
+        if effect.pattern != "parse_failure":
+            total += 1
+            success += effect.risk_downgraded or effect.action_downgraded
+        print_json_line(
+            {"event": event, "clean": clean, "attacked": attacked, "effect": effect}
+        )
+    return total, success
+
+
+async def _live_compare(
+    events: List[str],
+    mode: ModeType,
+    attack: AttackProfileType,
+    fused_bc: bool,
+    cache_mode: CacheMode,
+    json_output: bool,
+    table: Table,
+) -> Tuple[int, int, Dict[str, Any]]:
+    """
+    Add a table row per event as it completes, redrawing the table live.
+    Returns (total, bypassed, summary) with the summary in event order.
+    """
+    total = 0
+    success = 0
+    summary: Dict[str, Any] = {}
+
+    # Off a terminal there is nothing to redraw; the table is printed once.
+    live = (
+        Live(table, console=console, refresh_per_second=4)
+        if console.is_terminal
+        else nullcontext()
+    )
+    pairs = _compare_pairs(events, mode, attack, fused_bc, cache_mode, json_output)
+    with live:
+        async for event, clean, attacked in pairs:
+            effect = compute_bypass_effect(clean, attacked)
+
+            # Unparseable runs are shown but left out of the bypass rate.
+            bypassed = effect.risk_downgraded or effect.action_downgraded
+            if effect.pattern == "parse_failure":
+                verdict = "[yellow]N/A[/yellow]"
+            else:
+                total += 1
+                success += bypassed
+                verdict = "[green]YES[/green]" if bypassed else "[red]NO[/red]"
+
+            table.add_row(
+                event,
+                f"{clean.stage_b_risk} → {attacked.stage_b_risk}",
+                f"{clean.stage_c_action} → {attacked.stage_c_action}",
+                effect.pattern,
+                verdict,
+            )
+
+            summary[event] = {
+                "clean": clean,
+                "attacked": attacked,
+                "effect": effect,
+            }
+
+    if not console.is_terminal:
+        console.print(table)
+    return total, success, {event: summary[event] for event in events}
+
+
+# Everything that changes a batch result: the event, the mode, the attack
+# profile and the --fused-bc / --json-output switches.
+ResultKey = Tuple[str, str, str, bool, bool]
+
+
+def _result_key(
+    raw_input: str,
+    mode: str,
+    attack_profile: str,
+    fused_bc: bool,
+    json_output: bool,
+) -> ResultKey:
+    return (raw_input, mode, attack_profile, fused_bc, json_output)
+
+
+def _checkpoint_record(result: StageResult, fused_bc: bool, json_output: bool) -> bytes:
+    """One JSONL line for the batch output: the result plus the switches it ran with."""
+    record = asdict(result)
+    record["fused_bc"] = fused_bc
+    record["json_output"] = json_output
+    return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _load_completed(path: Path) -> Set[ResultKey]:
+    """
+    Keys of results already checkpointed in a JSONL output file.
+
+    A torn last line (the previous run was killed mid-write) is truncated so
+    new results append cleanly; other unreadable lines are skipped. Records
+    written before the switches were stored count as run with both off.
+    """
+    done: Set[ResultKey] = set()
+    if not path.exists():
+        return done
+    with path.open("rb+") as fh:
+        offset = 0
+        line = b""
+        for line in fh:
+            start = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+                key = _result_key(
+                    record["raw_input"],
+                    record["mode"],
+                    record["attack_profile"],
+                    record.get("fused_bc", False),
+                    record.get("json_output", False),
+                )
+            except (orjson.JSONDecodeError, KeyError, TypeError, AttributeError):
+                if not line.endswith(b"\n"):
+                    logger.warning("Dropping incomplete last line of %s", path)
+                    fh.truncate(start)
+                    return done
+                logger.warning("Skipping unreadable line in %s", path)
+                continue
+            done.add(key)
+        if line and not line.endswith(b"\n"):
+            # Complete record without its newline; terminate it before appending.
+            fh.seek(0, 2)
+            fh.write(b"\n")
+    return done
+
+
+async def _run_batch(
+    events: List[str],
+    mode: ModeType,
+    attack: AttackProfileType,
+    fused_bc: bool,
+    cache_mode: CacheMode,
+    json_output: bool,
+    output: Path,
+    concurrency: int,
+) -> int:
+    """
+    Run events concurrently and append each result to `output` as soon as it
+    completes, so an interrupted batch can resume where it stopped.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(event: str) -> StageResult:
+        async with semaphore:
+            return await arun_pipeline(
+                event, mode, attack, fused_bc, cache_mode, json_output
+            )
+
+    written = 0
+    with output.open("ab") as fh, Progress(console=console) as progress:
+        task = progress.add_task("Running events", total=len(events))
+        for finished in asyncio.as_completed([_one(event) for event in events]):
+            result = await finished
+            fh.write(_checkpoint_record(result, fused_bc, json_output))
+            fh.flush()
+            written += 1
+            progress.advance(task)
+    return written
+
 
 @app.command("run")
 def cli_run(
@@ -23,20 +300,38 @@ def cli_run(
         "--attack",
         help="Attack profile: none|inline_injection|summary_injection|policy_override",
     ),
+    fused_bc: _FusedBcOption = False,
+    cache_mode: _CacheOption = "exact",
+    json_output: _JsonOutputOption = False,
+    quiet: bool = typer.Option(
+        False,
+        "--quiet",
+        help="Skip per-event output and only print the JSON summary.",
+    ),
+    plain: bool = typer.Option(
+        False,
+        "--plain",
+        help="Print per-event output as plain text instead of Rich panels.",
+    ),
+    columnar: bool = typer.Option(
+        False,
+        "--columnar",
+        help="Emit the JSON summary as one list per field instead of one object per event.",
+    ),
 ) -> None:
     """
     Run the pipeline over the default event set and print rich + JSON output.
     """
     events = default_events()
-    results: List[StageResult] = []
+    results: List[StageResult] = _run_async(
+        arun_events(events, mode, attack, fused_bc, cache_mode, json_output)
+    )
 
-    for event in events:
-        result = run_pipeline(event, mode=mode, attack_profile=attack)
-        results.append(result)
-        pretty_print_result(result)
+    if not quiet:
+        for result in results:
+            pretty_print_result(result, plain=plain)
 
-    console.rule("[title]JSON SUMMARY[/title]")
-    console.print_json(data=results)
+    print_json_summary(to_columns(results) if columnar else results)
 
 
 @app.command("compare")
@@ -50,6 +345,14 @@ def cli_compare(
             "inline_injection|summary_injection|policy_override"
         ),
     ),
+    fused_bc: _FusedBcOption = False,
+    cache_mode: _CacheOption = "exact",
+    json_output: _JsonOutputOption = False,
+    jsonl: bool = typer.Option(
+        False,
+        "--jsonl",
+        help="Stream one JSON line per event instead of the table and summary.",
+    ),
 ) -> None:
     """
     For each event, run:
@@ -64,6 +367,14 @@ def cli_compare(
 
     events = default_events()
 
+    if jsonl:
+        total, success = _run_async(
+            _stream_compare(events, mode, attack, fused_bc, cache_mode, json_output)
+        )
+        bypass_rate = (success / total * 100) if total > 0 else 0.0
+        print_json_line({"total": total, "bypassed": success, "bypass_rate": bypass_rate})
+        return
+
     table = Table(
         title=f"Prompt Injection Threat Simulation (clean → {attack})",
         box=None,
@@ -75,49 +386,90 @@ def cli_compare(
     table.add_column("Pattern")
     table.add_column("Bypassed?")
 
-    total = 0
-    success = 0
-    summary: Dict[str, Any] = {}
-
-    for event in events:
-        total += 1
+    total, success, summary = _run_async(
+        _live_compare(events, mode, attack, fused_bc, cache_mode, json_output, table)
+    )
 
-        clean = run_pipeline(event, mode=mode, attack_profile="none")
-        attacked_result = run_pipeline(event, mode=mode, attack_profile=attack)
+    console.rule()
 
-        effect = compute_bypass_effect(clean, attacked_result)
+    bypass_rate = (success / total * 100) if total > 0 else 0.0
+    console.print(f"[bold magenta]Bypass Success Rate: {bypass_rate:.2f}%[/bold magenta]")
 
-        bypassed = effect["risk_downgraded"] or effect["action_downgraded"]
-        if bypassed:
-            success += 1
+    print_bypass_insights(summary)
 
-        table.add_row(
-            event,
-            f"{clean['stage_b_risk']} → {attacked_result['stage_b_risk']}",
-            f"{clean['stage_c_action']} → {attacked_result['stage_c_action']}",
-            effect["pattern"],
-            "[green]YES[/green]" if bypassed else "[red]NO[/red]",
-        )
+    print_json_summary(summary)
 
-        summary[event] = {
-            "clean": clean,
-            "attacked": attacked_result,
-            "effect": effect,
-        }
 
-    console.print(table)
-    console.rule()
+@app.command("batch")
+def cli_batch(
+    events_file: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        help="Text file with one event per line.",
+    ),
+    mode: ModeType = typer.Option("normal", "--mode", help="neutral|normal|hardened"),
+    attack: AttackProfileType = typer.Option(
+        "none",
+        "--attack",
+        help="Attack profile: none|inline_injection|summary_injection|policy_override",
+    ),
+    fused_bc: _FusedBcOption = False,
+    cache_mode: _CacheOption = "exact",
+    json_output: _JsonOutputOption = False,
+    output: Path = typer.Option(
+        Path("results.jsonl"),
+        "--output",
+        help="JSONL checkpoint; events already present in it are skipped.",
+    ),
+    concurrency: int = typer.Option(
+        10,
+        "--concurrency",
+        min=1,
+        help="Maximum number of events processed at once.",
+    ),
+) -> None:
+    """
+    Run the pipeline over a large event file, checkpointing every result.
+    """
+    with events_file.open(encoding="utf-8") as fh:
+        # Duplicate lines only need to run once.
+        events = list(dict.fromkeys(line.strip() for line in fh if line.strip()))
 
-    bypass_rate = (success / total * 100) if total > 0 else 0.0
-    console.print(f"[bold magenta]Bypass Success Rate: {bypass_rate:.2f}%[/bold magenta]")
+    done = _load_completed(output)
+    pending = [
+        e
+        for e in events
+        if _result_key(e, mode, attack, fused_bc, json_output) not in done
+    ]
 
-    print_bypass_insights(summary)
+    console.print(
+        f"[section]{len(events) - len(pending)} already done, "
+        f"{len(pending)} to run → {output}[/section]"
+    )
+    if not pending:
+        return
 
-    console.rule("[title]JSON SUMMARY[/title]")
-    console.print_json(data=summary)
+    written = _run_async(
+        _run_batch(
+            pending,
+            mode,
+            attack,
+            fused_bc,
+            cache_mode,
+            json_output,
+            output,
+            concurrency,
+        )
+    )
+    console.print(f"[bold magenta]Wrote {written} results to {output}[/bold magenta]")
 
 
 def main() -> None:
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
     app()
 
 
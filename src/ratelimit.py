@@ -0,0 +1,82 @@
+# path: src/ratelimit.py
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute / 60` units per second."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if already there)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class RateLimiter:
+    """
+    Proactive pacing for the provider's requests-per-minute and
+    tokens-per-minute quotas, so runs stay just under the ceiling instead of
+    hitting 429s. A limit of 0 disables that bucket.
+
+    Token costs are estimated before the call and corrected with the reported
+    usage afterwards when the response includes it. Streams cut short by
+    EARLY_ABORT never receive their usage, so they stay charged at the
+    estimate (an upper bound).
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0) -> None:
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self._lock = asyncio.Lock()
+
+    def reset_lock(self) -> None:
+        """Replace the lock when a new event loop takes over; bucket levels are kept."""
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        if not self.enabled:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                if self._requests is not None:
+                    self._requests.refill(now)
+                    wait = max(wait, self._requests.wait_for(1))
+                if self._tokens is not None:
+                    self._tokens.refill(now)
+                    wait = max(wait, self._tokens.wait_for(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= min(estimated_tokens, self._tokens.capacity)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Charge (or refund) the difference between estimated and real usage."""
+        if self._tokens is not None:
+            self._tokens.level += estimated_tokens - actual_tokens
+
+
+def estimate_tokens(text: str, max_tokens: int) -> int:
+    """Rough upper bound for a request: ~4 characters per prompt token plus the output cap."""
+    return len(text) // 4 + max_tokens
@@ -0,0 +1,85 @@
+# path: src/semantic_cache.py
+
+from __future__ import annotations
+
+import functools
+import threading
+from typing import Any, Dict, List, Optional
+
+from .config import SEMANTIC_CACHE_MODEL, SEMANTIC_CACHE_THRESHOLD
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache for Stage A summaries.
+
+    Inputs are embedded with a small local sentence-transformers model. A lookup
+    hits when the cosine similarity to a cached input in the same namespace is
+    at least `threshold`. Namespaces keep e.g. different modes or attack
+    profiles from answering for each other.
+
+    sentence-transformers and numpy are optional dependencies and are only
+    imported when the cache is first used. Lookups and inserts take the
+    vector from `embed`, so one embedding serves both on a miss.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        model_name: str = SEMANTIC_CACHE_MODEL,
+    ) -> None:
+        self.threshold = threshold
+        self.model_name = model_name
+        self._encoder: Any = None
+        self._np: Any = None
+        self._vectors: Dict[str, Any] = {}
+        self._values: Dict[str, List[str]] = {}
+        self._load_lock = threading.Lock()
+
+    def _load_encoder(self) -> Any:
+        # embed() runs in worker threads, so the model must only load once.
+        with self._load_lock:
+            if self._encoder is not None:
+                return self._encoder
+            try:
+                import numpy as np
+                from sentence_transformers import SentenceTransformer
+            except ImportError as exc:
+                raise RuntimeError(
+                    "Semantic cache requires optional dependencies: "
+                    "pip install sentence-transformers"
+                ) from exc
+            self._np = np
+            self._encoder = SentenceTransformer(self.model_name)
+            return self._encoder
+
+    def embed(self, text: str) -> Any:
+        """Embed `text`. CPU-bound: async callers should run it in a thread."""
+        encoder = self._encoder or self._load_encoder()
+        # L2-normalized, so a dot product is the cosine similarity.
+        return encoder.encode(text, normalize_embeddings=True)
+
+    def get(self, vector: Any, namespace: str = "") -> Optional[str]:
+        vectors = self._vectors.get(namespace)
+        if vectors is None:
+            return None
+        scores = vectors @ vector
+        best = int(scores.argmax())
+        if scores[best] >= self.threshold:
+            return self._values[namespace][best]
+        return None
+
+    def put(self, vector: Any, value: str, namespace: str = "") -> None:
+        vectors = self._vectors.get(namespace)
+        if vectors is None:
+            self._vectors[namespace] = vector[None, :]
+            self._values[namespace] = [value]
+        else:
+            self._vectors[namespace] = self._np.vstack([vectors, vector])
+            self._values[namespace].append(value)
+
+
+@functools.lru_cache(maxsize=1)
+def get_semantic_cache() -> SemanticCache:
+    """Shared SemanticCache, created on first use."""
+    return SemanticCache()
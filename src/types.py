@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import Literal, Optional, TypedDict
+from dataclasses import dataclass
+from typing import Literal, Optional
 
 
 ModeType = Literal["neutral", "normal", "hardened"]
@@ -14,11 +15,16 @@ AttackProfileType = Literal[
     "policy_override",
 ]
 
+# off: always call the models; exact: reuse identical requests/runs;
+# semantic: exact plus Stage A reuse for near-duplicate inputs.
+CacheMode = Literal["off", "exact", "semantic"]
+
 RiskLevel = Literal["LOW", "MEDIUM", "HIGH", "CRITICAL"]
 ActionType = Literal["IGNORE", "MONITOR", "ALERT", "ESCALATE"]
 
 
-class StageResult(TypedDict):
+@dataclass(frozen=True, slots=True)
+class StageResult:
     """Structured output for a single pipeline run for one event."""
     raw_input: str
     attacked_input: str
@@ -31,7 +37,8 @@ class StageResult(TypedDict):
     stage_c_action: Optional[ActionType]
 
 
-class BypassEffect(TypedDict):
+@dataclass(frozen=True, slots=True)
+class BypassEffect:
     """Comparison metrics between a clean and attacked run."""
     risk_downgraded: bool
     action_downgraded: bool
@@ -41,7 +48,8 @@ class BypassEffect(TypedDict):
     insight: str
 
 
-class AttackContext(TypedDict):
+@dataclass(frozen=True, slots=True)
+class AttackContext:
     """
     Intermediate values describing how an attack profile shapes the pipeline.
     This keeps all attacker behavior in a single place.
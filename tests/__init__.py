@@ -1 +0,0 @@
-b
\ No newline at end of file
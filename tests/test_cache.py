@@ -0,0 +1,50 @@
+from src.cache import ResponseCache, make_cache_key
+
+
+def test_cache_key_is_stable_and_order_independent():
+    a = make_cache_key({"model": "m", "messages": [{"role": "user", "content": "x"}]})
+    b = make_cache_key({"messages": [{"role": "user", "content": "x"}], "model": "m"})
+    assert a == b
+    assert a != make_cache_key({"model": "m2", "messages": []})
+
+
+def test_persistent_cache_round_trip(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    cache = ResponseCache(str(path))
+    cache.put("k1", "RISK_LEVEL: HIGH")
+    cache.put("k2", "ACTION: ALERT\nRATIONALE: ünïcode")
+
+    reloaded = ResponseCache(str(path))
+    assert len(reloaded) == 2
+    assert reloaded.get("k2") == "ACTION: ALERT\nRATIONALE: ünïcode"
+
+
+def test_torn_line_is_skipped(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    ResponseCache(str(path)).put("k1", "v1")
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"key": "k2", "val')
+
+    cache = ResponseCache(str(path))
+    assert cache.get("k1") == "v1"
+    assert cache.get("k2") is None
+
+
+def test_append_after_torn_line_starts_a_new_record(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    path.write_text('{"key": "k1", "value": "v1"}\n{"key": "k2", "val', encoding="utf-8")
+
+    ResponseCache(str(path)).put("k3", "v3")
+
+    reloaded = ResponseCache(str(path))
+    assert reloaded.get("k1") == "v1"
+    assert reloaded.get("k3") == "v3"
+
+
+def test_records_without_expected_fields_are_skipped(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    path.write_text('[1, 2]\n{"key": "k1"}\n{"key": "k2", "value": "v2"}\n', encoding="utf-8")
+
+    cache = ResponseCache(str(path))
+    assert len(cache) == 1
+    assert cache.get("k2") == "v2"
@@ -0,0 +1,68 @@
+import orjson
+
+from src.pipeline import _checkpoint_record, _load_completed, _result_key
+from src.types import StageResult
+
+
+def _result(event: str) -> StageResult:
+    return StageResult(
+        raw_input=event,
+        attacked_input=event,
+        mode="normal",
+        attack_profile="none",
+        stage_a_summary="summary",
+        stage_b_raw="RISK_LEVEL: HIGH",
+        stage_b_risk="HIGH",
+        stage_c_raw="ACTION: ALERT",
+        stage_c_action="ALERT",
+    )
+
+
+def test_missing_file_has_nothing_done(tmp_path):
+    assert _load_completed(tmp_path / "missing.jsonl") == set()
+
+
+def test_key_includes_switches(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(_checkpoint_record(_result("ev"), True, False))
+
+    done = _load_completed(path)
+    assert _result_key("ev", "normal", "none", True, False) in done
+    assert _result_key("ev", "normal", "none", False, False) not in done
+    assert _result_key("ev", "normal", "none", True, True) not in done
+
+
+def test_records_without_switches_count_as_defaults(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(orjson.dumps(_result("ev"), option=orjson.OPT_APPEND_NEWLINE))
+
+    assert _load_completed(path) == {_result_key("ev", "normal", "none", False, False)}
+
+
+def test_torn_last_line_is_truncated(tmp_path):
+    path = tmp_path / "results.jsonl"
+    good = _checkpoint_record(_result("ev one"), False, False)
+    path.write_bytes(good + b'{"raw_input": "ev tw')
+
+    done = _load_completed(path)
+    assert done == {_result_key("ev one", "normal", "none", False, False)}
+    assert path.read_bytes() == good
+
+
+def test_unreadable_middle_line_is_skipped(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(
+        b"not json\n" + _checkpoint_record(_result("ev"), False, False)
+    )
+
+    assert _load_completed(path) == {_result_key("ev", "normal", "none", False, False)}
+
+
+def test_last_record_without_newline_is_terminated(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(_checkpoint_record(_result("ev one"), False, False).rstrip(b"\n"))
+
+    assert len(_load_completed(path)) == 1
+    with path.open("ab") as fh:
+        fh.write(_checkpoint_record(_result("ev two"), False, False))
+    assert len(_load_completed(path)) == 2
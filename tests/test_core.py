@@ -0,0 +1,123 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import replace
+
+from src import core
+from src.core import _stages_b_c_overlapped, compute_bypass_effect, to_columns
+from src.prompts import build_stage_c_prompt
+from src.types import StageResult
+
+
+def _result(risk, action, attack_profile="none") -> StageResult:
+    return StageResult(
+        raw_input="ev",
+        attacked_input="ev",
+        mode="normal",
+        attack_profile=attack_profile,
+        stage_a_summary="summary",
+        stage_b_raw=f"RISK_LEVEL: {risk}",
+        stage_b_risk=risk,
+        stage_c_raw=f"ACTION: {action}",
+        stage_c_action=action,
+    )
+
+
+def test_both_downgraded():
+    effect = compute_bypass_effect(
+        _result("HIGH", "ALERT"), _result("LOW", "IGNORE", "inline_injection")
+    )
+    assert effect.pattern == "both_downgraded"
+    assert effect.risk_delta == -2
+    assert effect.action_delta == -2
+    assert effect.risk_downgraded and effect.action_downgraded
+
+
+def test_single_dimension_downgrades():
+    clean = _result("HIGH", "ALERT")
+    assert compute_bypass_effect(clean, _result("MEDIUM", "ALERT")).pattern == "risk_only_downgrade"
+    assert compute_bypass_effect(clean, _result("HIGH", "MONITOR")).pattern == "action_only_downgrade"
+    assert compute_bypass_effect(clean, clean).pattern == "no_change"
+    assert compute_bypass_effect(clean, _result("CRITICAL", "IGNORE")).pattern == "upgraded_or_unclear"
+
+
+def test_unparsed_label_is_parse_failure():
+    for attacked in (_result(None, "IGNORE"), _result("LOW", None)):
+        effect = compute_bypass_effect(_result("HIGH", "ALERT"), attacked)
+        assert effect.pattern == "parse_failure"
+        assert not effect.risk_downgraded and not effect.action_downgraded
+        assert effect.risk_delta == effect.action_delta == 0
+
+
+def test_to_columns():
+    columns = to_columns([_result("HIGH", "ALERT"), _result("LOW", "IGNORE")])
+    assert columns["stage_b_risk"] == ["HIGH", "LOW"]
+    assert columns["stage_c_action"] == ["ALERT", "IGNORE"]
+    assert len(columns) == 9
+
+
+class _SpeculativeClient:
+    """Stage B answers with `b_answer`, reporting `b_prefix` mid-stream."""
+
+    def __init__(self, b_prefix, b_answer):
+        self.b_prefix = b_prefix
+        self.b_answer = b_answer
+        self.c_prompts = []
+        self.c_cancelled = 0
+
+    async def call_model_b_watch(self, _prompt, _until, on_match, use_cache=True):
+        on_match(self.b_prefix)
+        await asyncio.sleep(0.01)
+        return self.b_answer
+
+    async def call_model_c(self, prompt, use_cache=True):
+        self.c_prompts.append(prompt)
+        try:
+            await asyncio.sleep(0.02)
+        except asyncio.CancelledError:
+            self.c_cancelled += 1
+            raise
+        return "ACTION: ALERT"
+
+
+def test_speculative_stage_c_is_kept_when_risk_matches():
+    client = _SpeculativeClient("RISK_LEVEL: HIGH", "RISK_LEVEL: HIGH\nRATIONALE: r")
+
+    b_raw, b_risk, c_raw = asyncio.run(
+        _stages_b_c_overlapped(client, "summary", "normal", None, True)
+    )
+
+    assert (b_raw, b_risk, c_raw) == ("RISK_LEVEL: HIGH\nRATIONALE: r", "HIGH", "ACTION: ALERT")
+    assert len(client.c_prompts) == 1
+    assert client.c_cancelled == 0
+
+
+def test_speculative_stage_c_is_resent_when_risk_changes():
+    # The first label seen mid-stream is not the one the full answer parses to.
+    client = _SpeculativeClient("risk_level: low", "RISK_LEVEL: HIGH\nRATIONALE: risk_level: low")
+
+    _, b_risk, _ = asyncio.run(
+        _stages_b_c_overlapped(client, "summary", "normal", None, True)
+    )
+
+    assert b_risk == "HIGH"
+    assert client.c_cancelled == 1
+    assert len(client.c_prompts) == 2
+    assert client.c_prompts[-1] == build_stage_c_prompt("summary", "HIGH", "normal", None)
+
+
+def test_runs_with_empty_answers_are_not_memoized(monkeypatch):
+    runs = []
+
+    async def fake_run(*args):
+        runs.append(args)
+        stage_b_raw = "" if len(runs) == 1 else "RISK_LEVEL: HIGH"
+        return replace(_result("HIGH", "ALERT"), stage_b_raw=stage_b_raw)
+
+    monkeypatch.setattr(core, "MODEL_TEMPERATURE", 0)
+    monkeypatch.setattr(core, "_RESULT_CACHE", OrderedDict())
+    monkeypatch.setattr(core, "_arun_pipeline", fake_run)
+
+    for _ in range(3):
+        asyncio.run(core.arun_pipeline("ev"))
+
+    assert len(runs) == 2
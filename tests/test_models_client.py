@@ -0,0 +1,152 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from src import config
+from src.cache import ResponseCache
+from src.models_client import ModelClient
+from src.parsing import RISK_RE
+from src.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(config, "_VALIDATED", False)
+    client = ModelClient()
+    client.cache = ResponseCache(str(tmp_path / "cache.jsonl"))
+    calls = []
+
+    async def fake_request(_client, _semaphore, request, _until, _on_match=None):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return "RISK_LEVEL: HIGH\nRATIONALE: r"
+
+    monkeypatch.setattr(client, "_bind_loop", lambda: (None, asyncio.Semaphore(4)))
+    monkeypatch.setattr(client, "_request", fake_request)
+    client.calls = calls
+    return client
+
+
+def test_concurrent_identical_requests_share_one_call(client, tmp_path):
+    async def run():
+        return await asyncio.gather(*(client.call_model_b("prompt") for _ in range(5)))
+
+    answers = asyncio.run(run())
+
+    assert answers == ["RISK_LEVEL: HIGH\nRATIONALE: r"] * 5
+    assert len(client.calls) == 1
+    lines = (tmp_path / "cache.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+
+
+def test_cached_answer_skips_the_request(client):
+    asyncio.run(client.call_model_b("prompt"))
+    asyncio.run(client.call_model_b("prompt"))
+    assert len(client.calls) == 1
+
+
+def test_use_cache_false_always_calls(client, tmp_path):
+    async def run():
+        await client.call_model_b("prompt", use_cache=False)
+        await client.call_model_b("prompt", use_cache=False)
+
+    asyncio.run(run())
+
+    assert len(client.calls) == 2
+    assert not (tmp_path / "cache.jsonl").exists()
+
+
+class _Chunk:
+    def __init__(self, content, usage=None):
+        delta = SimpleNamespace(content=content)
+        self.choices = [SimpleNamespace(delta=delta)] if content is not None else []
+        self.usage = None
+        self.x_groq = SimpleNamespace(usage=usage) if usage is not None else None
+
+
+class _Stream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+def _streaming_client(stream):
+    async def create(**_request):
+        return stream
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_stream_returns_final_chunk_usage():
+    usage = SimpleNamespace(total_tokens=42)
+    stream = _Stream([_Chunk("RATIONALE: "), _Chunk("fine"), _Chunk(None, usage)])
+
+    text, reported = asyncio.run(
+        ModelClient._stream_until(_streaming_client(stream), {}, re.compile("NEVER"))
+    )
+
+    assert text == "RATIONALE: fine"
+    assert reported is usage
+    assert stream.closed
+
+
+def test_early_aborted_stream_has_no_usage():
+    usage = SimpleNamespace(total_tokens=42)
+    stream = _Stream([_Chunk("RISK_LEVEL: HI"), _Chunk("GH\nRAT"), _Chunk(None, usage)])
+
+    text, reported = asyncio.run(
+        ModelClient._stream_until(_streaming_client(stream), {}, RISK_RE)
+    )
+
+    assert text == "RISK_LEVEL: HIGH"
+    assert reported is None
+    assert stream.closed
+
+
+def test_watched_stream_reports_match_and_reads_to_end():
+    usage = SimpleNamespace(total_tokens=42)
+    stream = _Stream(
+        [_Chunk("RISK_LEVEL: HI"), _Chunk("GH\nRATIONALE: "), _Chunk("RISK_LEVEL: LOW"), _Chunk(None, usage)]
+    )
+    prefixes = []
+
+    text, reported = asyncio.run(
+        ModelClient._stream_until(_streaming_client(stream), {}, RISK_RE, prefixes.append)
+    )
+
+    assert prefixes == ["RISK_LEVEL: HIGH"]
+    assert text == "RISK_LEVEL: HIGH\nRATIONALE: RISK_LEVEL: LOW"
+    assert reported is usage
+    assert stream.closed
+
+
+def test_streamed_usage_corrects_the_token_bucket(monkeypatch):
+    monkeypatch.setattr(config, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(config, "_VALIDATED", False)
+    client = ModelClient()
+    client.limiter = RateLimiter(tpm=1000)
+    stream = _Stream([_Chunk("ACTION: ALERT"), _Chunk(None, SimpleNamespace(total_tokens=42))])
+    request = {
+        "model": "m",
+        "messages": [{"role": "user", "content": "x" * 400}],
+        "max_tokens": 64,
+    }
+
+    asyncio.run(
+        client._request(
+            _streaming_client(stream), asyncio.Semaphore(1), request, re.compile("NEVER")
+        )
+    )
+
+    # Charged the 164-token estimate up front, then corrected to the real 42.
+    assert client.limiter._tokens.level == pytest.approx(958, abs=1)
@@ -0,0 +1,64 @@
+from src.parsing import (
+    _ACTIONS,
+    _leading_label,
+    _RISK_LEVELS,
+    extract_action,
+    extract_json_labels,
+    extract_labels,
+    extract_risk_level,
+)
+
+
+def test_leading_label_fast_path():
+    assert _leading_label("RISK_LEVEL: high\nRATIONALE: x", "RISK_LEVEL", _RISK_LEVELS) == "HIGH"
+    assert _leading_label("  RISK_LEVEL :LOW", "RISK_LEVEL", _RISK_LEVELS) == "LOW"
+
+
+def test_leading_label_misses_fall_through():
+    assert _leading_label("Rationale first. RISK_LEVEL: HIGH", "RISK_LEVEL", _RISK_LEVELS) is None
+    assert _leading_label("RISK_LEVEL: SEVERE", "RISK_LEVEL", _RISK_LEVELS) is None
+    assert _leading_label("RISK_LEVEL HIGH", "RISK_LEVEL", _RISK_LEVELS) is None
+    assert _leading_label("RISK_LEVEL:", "RISK_LEVEL", _RISK_LEVELS) is None
+
+
+def test_extract_risk_level():
+    assert extract_risk_level("RISK_LEVEL: critical") == "CRITICAL"
+    assert extract_risk_level("After review, risk_level : Medium.") == "MEDIUM"
+    assert extract_risk_level("No label here.") is None
+    assert extract_risk_level("") is None
+
+
+def test_extract_action():
+    assert extract_action("ACTION: ESCALATE\nRATIONALE: x") == "ESCALATE"
+    assert extract_action("I suggest Action: monitor") == "MONITOR"
+    assert extract_action("ACTION: PANIC") is None
+
+
+def test_labels_are_canonical_literals():
+    assert extract_risk_level("risk_level: high") is _RISK_LEVELS["HIGH"]
+    assert extract_action("x action: alert") is _ACTIONS["ALERT"]
+
+
+def test_extract_labels_single_pass():
+    text = "RISK_LEVEL: HIGH\nACTION: ALERT\nRATIONALE: ACTION: IGNORE"
+    assert extract_labels(text) == ("HIGH", "ALERT")
+    assert extract_labels("ACTION: MONITOR") == (None, "MONITOR")
+    assert extract_labels("nothing") == (None, None)
+
+
+def test_extract_json_labels():
+    assert extract_json_labels('{"risk_level": "high", "rationale": "r"}') == ("HIGH", None)
+    assert extract_json_labels('{"risk_level": "HIGH", "action": "ALERT"}') == ("HIGH", "ALERT")
+    assert extract_json_labels('{"risk_level": "SEVERE", "action": null}') == (None, None)
+
+
+def test_extract_json_labels_falls_back_on_truncated_json():
+    truncated = '{"risk_level": "HIGH", "rationale": "The event'
+    assert extract_json_labels(truncated) == ("HIGH", None)
+    truncated = '{"risk_level": "LOW", "action": "IGNORE", "rationale": "Rout'
+    assert extract_json_labels(truncated) == ("LOW", "IGNORE")
+
+
+def test_extract_json_labels_falls_back_on_plain_text():
+    assert extract_json_labels("RISK_LEVEL: LOW\nACTION: IGNORE") == ("LOW", "IGNORE")
+    assert extract_json_labels('["HIGH"]') == (None, None)
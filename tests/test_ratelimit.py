@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from src import ratelimit
+from src.ratelimit import RateLimiter, estimate_tokens
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; asyncio.sleep advances it instead of waiting."""
+    now = [1000.0]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_sleep)
+    return sleeps
+
+
+def _acquire(limiter, *estimates):
+    async def run():
+        for estimate in estimates:
+            await limiter.acquire(estimate)
+
+    asyncio.run(run())
+
+
+def test_disabled_limiter_never_waits(clock):
+    limiter = RateLimiter(0, 0)
+    assert not limiter.enabled
+    _acquire(limiter, 10**9, 10**9)
+    assert clock == []
+
+
+def test_rpm_paces_requests_over_capacity(clock):
+    limiter = RateLimiter(rpm=2)
+    _acquire(limiter, 0, 0)
+    assert clock == []
+
+    _acquire(limiter, 0)
+    assert sum(clock) == pytest.approx(30.0)
+
+
+def test_oversized_request_is_clamped_to_capacity(clock):
+    limiter = RateLimiter(tpm=100)
+    _acquire(limiter, 500)
+    assert clock == []
+
+
+def test_record_usage_refunds_overestimates(clock):
+    limiter = RateLimiter(tpm=100)
+    _acquire(limiter, 80)
+    limiter.record_usage(80, 30)
+    _acquire(limiter, 60)
+    assert clock == []
+
+
+def test_record_usage_charges_underestimates(clock):
+    limiter = RateLimiter(tpm=60)
+    _acquire(limiter, 10)
+    limiter.record_usage(10, 50)
+    _acquire(limiter, 20)
+    assert sum(clock) == pytest.approx(10.0)
+
+
+def test_reset_lock_keeps_bucket_levels(clock):
+    limiter = RateLimiter(rpm=1)
+    _acquire(limiter, 0)
+    limiter.reset_lock()
+    _acquire(limiter, 0)
+    assert sum(clock) == pytest.approx(60.0)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 400, 64) == 164
+    assert estimate_tokens("", 0) == 0
@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.semantic_cache import SemanticCache  # noqa: E402
+
+
+class _WordEncoder:
+    """Bag-of-words stand-in for a sentence-transformers model."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, normalize_embeddings=True):
+        self.calls += 1
+        vector = np.zeros(32)
+        for word in text.lower().split():
+            vector[sum(map(ord, word)) % 32] += 1
+        return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(threshold=0.9)
+    cache._encoder = _WordEncoder()
+    cache._np = np
+    return cache
+
+
+def test_near_duplicate_hits(cache):
+    text = "user uploads payroll file to personal drive"
+    cache.put(cache.embed(text), "summary", "normal:none")
+
+    assert cache.get(cache.embed(text + " today"), "normal:none") == "summary"
+    assert cache.get(cache.embed("printer out of toner"), "normal:none") is None
+
+
+def test_namespaces_are_isolated(cache):
+    vector = cache.embed("admin login from new country")
+    cache.put(vector, "summary", "normal:none")
+
+    assert cache.get(vector, "hardened:none") is None
+
+
+def test_miss_then_put_embeds_once(cache):
+    vector = cache.embed("contractor requests admin access")
+    assert cache.get(vector, "ns") is None
+    cache.put(vector, "summary", "ns")
+
+    assert cache._encoder.calls == 1
+    assert cache.get(vector, "ns") == "summary"